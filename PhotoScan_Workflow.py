@@ -107,10 +107,7 @@ def AlignPhoto(chunk, Accuracy, Key_Limit, Tie_Limit, QualityFilter, QualityCrit
                       keypoint_limit=Key_Limit, 
                       tiepoint_limit=Tie_Limit)
     chunk.alignCameras()
-    chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=False, fit_b2=False, 
-                          fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=False, 
-                          fit_p1=True, fit_p2=True, fit_p3=False, fit_p4=False, 
-                          adaptive_fitting=False, tiepoint_covariance=False)
+    OptimizeCamera(chunk)
     
 def BuildDenseCloud(chunk, Quality, FilterMode):
     try:
@@ -214,35 +211,53 @@ def StandardWorkflow(doc, chunk, **kwargs):
         doc.save()
 
 def GetResolution(chunk):
-    DEM_resolution = float(chunk.dense_cloud.meta['dense_cloud/resolution']) * chunk.transform.scale
-    Image_resolution = DEM_resolution / int(chunk.dense_cloud.meta['dense_cloud/depth_downscale'])
+    dense_cloud = chunk.dense_cloud
+    DEM_resolution = float(dense_cloud.meta['dense_cloud/resolution']) * chunk.transform.scale
+    Image_resolution = DEM_resolution / int(dense_cloud.meta['dense_cloud/depth_downscale'])
     return DEM_resolution, Image_resolution
 
+def OptimizeCamera(chunk, fit_all=False):
+    # All camera optimisations share the same two flag sets
+    # The full intrinsic set is only fitted in the final refinements
+    chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=fit_all, fit_b2=fit_all, 
+                          fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=fit_all, 
+                          fit_p1=True, fit_p2=True, fit_p3=fit_all, fit_p4=fit_all, 
+                          adaptive_fitting=False, tiepoint_covariance=False)
+
 def ReduceError_RU(chunk, init_threshold=10):
     # This is used to reduce error based on reconstruction uncertainty
     tie_points = chunk.point_cloud
     fltr = PhotoScan.PointCloud.Filter()
     fltr.init(chunk, PhotoScan.PointCloud.Filter.ReconstructionUncertainty)
     threshold = init_threshold
+    # Bundle adjustment is the expensive step in this loop
+    # Therefore, batch the removals and only re-optimise camera
+    # after a meaningful fraction of points has been trimmed
+    removed = 0
+    batch_limit = max(1000, len(tie_points.points) / 100)
     while fltr.max_value > 10:
         fltr.selectPoints(threshold)
-        nselected = len([p for p in tie_points.points if p.selected])
-        if nselected >= len(tie_points.points) / 2 and threshold <= 50:
+        points = tie_points.points
+        nselected = sum(1 for p in points if p.selected)
+        if nselected >= len(points) / 2 and threshold <= 50:
             fltr.resetSelection()
             threshold += 1
             continue
         UnselectPointMatch(chunk)
-        nselected = len([p for p in tie_points.points if p.selected])
+        nselected = sum(1 for p in points if p.selected)
         if nselected == 0:
             break
         print('Delete {} tie point(s)'.format(nselected))
         tie_points.removeSelectedPoints()
-        chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=False, fit_b2=False, 
-                              fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=False, 
-                              fit_p1=True, fit_p2=True, fit_p3=False, fit_p4=False, 
-                              adaptive_fitting=False, tiepoint_covariance=False)
+        removed += nselected
+        if removed >= batch_limit:
+            OptimizeCamera(chunk)
+            removed = 0
         fltr.init(chunk, PhotoScan.PointCloud.Filter.ReconstructionUncertainty)
         threshold = init_threshold
+    # Re-optimise camera for any removals still pending
+    if removed > 0:
+        OptimizeCamera(chunk)
         
 def ReduceError_PA(chunk, init_threshold=2.0):
     # This is used to reduce error based on projection accuracy
@@ -250,31 +265,33 @@ def ReduceError_PA(chunk, init_threshold=2.0):
     fltr = PhotoScan.PointCloud.Filter()
     fltr.init(chunk, PhotoScan.PointCloud.Filter.ProjectionAccuracy)
     threshold = init_threshold
+    # Batch the removals as in ReduceError_RU
+    # The final optimisation below covers any removals still pending
+    removed = 0
+    batch_limit = max(1000, len(tie_points.points) / 100)
     while fltr.max_value > 2.0:
         fltr.selectPoints(threshold)
-        nselected = len([p for p in tie_points.points if p.selected])
-        if nselected >= len(tie_points.points) / 2 and threshold <= 3.0:
+        points = tie_points.points
+        nselected = sum(1 for p in points if p.selected)
+        if nselected >= len(points) / 2 and threshold <= 3.0:
             fltr.resetSelection()
             threshold += 0.1
             continue
         UnselectPointMatch(chunk)
-        nselected = len([p for p in tie_points.points if p.selected])
+        nselected = sum(1 for p in points if p.selected)
         if nselected == 0:
             break
         print('Delete {} tie point(s)'.format(nselected))
         tie_points.removeSelectedPoints()
-        chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=False, fit_b2=False, 
-                              fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=False, 
-                              fit_p1=True, fit_p2=True, fit_p3=False, fit_p4=False, 
-                              adaptive_fitting=False, tiepoint_covariance=False)
+        removed += nselected
+        if removed >= batch_limit:
+            OptimizeCamera(chunk)
+            removed = 0
         fltr.init(chunk, PhotoScan.PointCloud.Filter.ProjectionAccuracy)
         threshold = init_threshold
     # This is to tighten tie point accuracy value
     chunk.tiepoint_accuracy = 0.1
-    chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=True, fit_b2=True, 
-                          fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=True, 
-                          fit_p1=True, fit_p2=True, fit_p3=True, fit_p4=True, 
-                          adaptive_fitting=False, tiepoint_covariance=False)
+    OptimizeCamera(chunk, fit_all=True)
     
 def ReduceError_RE(chunk, init_threshold=0.3):
     # This is used to reduce error based on repeojection error
@@ -282,25 +299,32 @@ def ReduceError_RE(chunk, init_threshold=0.3):
     fltr = PhotoScan.PointCloud.Filter()
     fltr.init(chunk, PhotoScan.PointCloud.Filter.ReprojectionError)
     threshold = init_threshold
+    # Batch the removals as in ReduceError_RU
+    removed = 0
+    batch_limit = max(1000, len(tie_points.points) / 100)
     while fltr.max_value > 0.3:
         fltr.selectPoints(threshold)
-        nselected = len([p for p in tie_points.points if p.selected])
-        if nselected >= len(tie_points.points) / 10:
+        points = tie_points.points
+        nselected = sum(1 for p in points if p.selected)
+        if nselected >= len(points) / 10:
             fltr.resetSelection()
             threshold += 0.01
             continue
         UnselectPointMatch(chunk)
-        nselected = len([p for p in tie_points.points if p.selected])
+        nselected = sum(1 for p in points if p.selected)
         if nselected == 0:
             break
         print('Delete {} tie point(s)'.format(nselected))
         tie_points.removeSelectedPoints()
-        chunk.optimizeCameras(fit_f=True, fit_cx=True, fit_cy=True, fit_b1=True, fit_b2=True, 
-                              fit_k1=True, fit_k2=True, fit_k3=True, fit_k4=True, 
-                              fit_p1=True, fit_p2=True, fit_p3=True, fit_p4=True, 
-                              adaptive_fitting=False, tiepoint_covariance=False)
+        removed += nselected
+        if removed >= batch_limit:
+            OptimizeCamera(chunk, fit_all=True)
+            removed = 0
         fltr.init(chunk, PhotoScan.PointCloud.Filter.ReprojectionError)
         threshold = init_threshold
+    # Re-optimise camera for any removals still pending
+    if removed > 0:
+        OptimizeCamera(chunk, fit_all=True)
 
 def UnselectPointMatch(chunk, *band):
     point_cloud = chunk.point_cloud
@@ -330,15 +354,12 @@ def UnselectPointMatch(chunk, *band):
             if not points[point_id].valid:
                 continue
 
-            if point_id in n_proj.keys():
-                n_proj[point_id] += 1
-            else:
-                n_proj[point_id] = 1
+            n_proj[point_id] = n_proj.get(point_id, 0) + 1
 
     # Unselect points which have less than three projections
-    for i in n_proj.keys():
-        if n_proj[i] < 3:
-            points[i].selected = False
+    for point_id, count in n_proj.items():
+        if count < 3:
+            points[point_id].selected = False
         
 # The following process will only be executed when running script    
 if __name__ == '__main__':